@@ -0,0 +1,82 @@
+"""Micro-benchmark: BeautifulSoup vs selectolax on a synthetic document.
+
+Run directly:
+
+    python benchmark_parsing.py [iterations]
+
+Times are wall-clock per full parse + text extraction.  Statistics are
+accumulated with Welford's single-pass algorithm, so no list of per-
+iteration timings is materialized regardless of the iteration count.
+"""
+
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+_SAMPLE_HTML = (
+    "<!doctype html><html><head><title>Benchmark</title>"
+    "<style>p { color: black; }</style></head><body>"
+    + "".join(
+        f"<div class='row'><h2>Section {i}</h2>"
+        f"<p>Paragraph {i} with some <b>markup</b> and a "
+        f"<a href='/page/{i}'>link</a> to follow.</p></div>"
+        for i in range(200)
+    )
+    + "<script>var x = 1;</script></body></html>"
+)
+
+
+def _run(fn, iterations: int) -> tuple:
+    """Time ``fn`` and return ``(mean_ms, std_ms)`` via Welford's algorithm."""
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        n += 1
+        delta = elapsed - mean
+        mean += delta / n
+        m2 += delta * (elapsed - mean)
+    std = (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+    return mean * 1000, std * 1000
+
+
+def benchmark_beautifulsoup(iterations: int) -> tuple:
+    def parse():
+        soup = BeautifulSoup(_SAMPLE_HTML, "html.parser")
+        soup.get_text(separator=" ", strip=True)
+
+    return _run(parse, iterations)
+
+
+def benchmark_selectolax(iterations: int) -> tuple:
+    def parse():
+        tree = LexborHTMLParser(_SAMPLE_HTML)
+        tree.body.text(separator=" ", strip=True)
+
+    return _run(parse, iterations)
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"Parsing a {len(_SAMPLE_HTML)} byte document, {iterations} iterations:")
+    mean, std = benchmark_beautifulsoup(iterations)
+    print(f"  BeautifulSoup: {mean:8.3f} ms +/- {std:.3f}")
+    if SELECTOLAX_AVAILABLE:
+        mean, std = benchmark_selectolax(iterations)
+        print(f"  selectolax:    {mean:8.3f} ms +/- {std:.3f}")
+    else:
+        print("  selectolax:    not installed")
+
+
+if __name__ == "__main__":
+    main()
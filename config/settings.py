@@ -0,0 +1,151 @@
+"""Runtime configuration for the PyRex pipeline.
+
+All tunables live in one ``PyRexSettings`` object.  Values come from (in
+order of precedence) constructor arguments, ``PYREX_*`` environment
+variables, and ``config/settings.toml``; anything not given falls back to
+the defaults below.
+"""
+
+import functools
+from pathlib import Path
+from typing import Tuple, Type
+
+from pydantic_settings import (
+    BaseSettings,
+    PydanticBaseSettingsSource,
+    SettingsConfigDict,
+    TomlConfigSettingsSource,
+)
+
+_CONFIG_FILE = Path(__file__).with_name("settings.toml")
+
+# The TOML source is built once and reused by every PyRexSettings
+# construction, so the file is parsed a single time per process.
+_toml_source = None
+
+
+class PyRexSettings(BaseSettings):
+    """All knobs for reading, cleaning and outputting WARC records."""
+
+    model_config = SettingsConfigDict(env_prefix="PYREX_", toml_file=_CONFIG_FILE)
+
+    # --- WARC reading ---------------------------------------------------
+    # How many payload bytes/characters to look at when sniffing for HTML.
+    html_detection_sample: int = 1024
+    # Gzip decompressor for .warc.gz input: "auto" picks the fastest
+    # available (rapidgzip > pigz subprocess > threaded isal > zlib),
+    # or force one of "rapidgzip", "pigz", "igzip", "gzip".
+    decompressor: str = "auto"
+    # Records with a declared Content-Length above this are fed through
+    # the incremental text extractor chunk by chunk instead of being
+    # materialized as one payload (4 MiB default).
+    streaming_threshold_bytes: int = 1 << 22
+
+    # --- Encoding detection and repair ----------------------------------
+    # Sample size handed to chardet and minimum confidence to trust it.
+    chardet_sample_size: int = 32768
+    confidence_threshold: float = 0.5
+    # Set to disable the pure-ASCII shortcut in fix_text_encoding.
+    skip_ascii_optimization: bool = False
+
+    # --- HTML cleanup ---------------------------------------------------
+    # Prefer BeautifulSoup with the lxml tree builder over selectolax.
+    use_lxml_parser: bool = False
+    remove_scripts: bool = True
+    remove_styles: bool = True
+    remove_metas: bool = True
+    remove_links: bool = True
+    remove_titles: bool = True
+    remove_base: bool = True
+    remove_comments: bool = True
+    # Documents whose visible text is shorter than this are discarded.
+    minimal_text_length: int = 100
+    # Raw payloads smaller than this are dropped before decoding; the
+    # default matches minimal_text_length (text can never have more
+    # characters than the payload has bytes), raise it to gate harder.
+    minimal_html_bytes: int = 100
+
+    # --- Language filtering ---------------------------------------------
+    # Discard documents whose detected language is not in the accept
+    # list (lowercase ISO 639-1 codes).  Detection reuses the already
+    # extracted visible text.
+    enable_language_filtering: bool = False
+    accepted_languages: Tuple[str, ...] = ("en",)
+    # Detection converges within a few KiB of text; only this many
+    # leading characters are handed to the detector.
+    language_detection_chars: int = 4096
+    # Texts shorter than this are rejected without running the
+    # detector; n-gram scores on tiny snippets are noise.
+    language_min_chars: int = 20
+    # When above 0, the top-1 language must also score at least this
+    # confidence (0..1); 0 keeps the cheap top-1-only fast path.
+    language_confidence_threshold: float = 0.0
+
+    # --- URL filtering --------------------------------------------------
+    # Discard records whose target URI has no recognized public suffix,
+    # or whose suffix is not in the accept list.  Runs on the WARC
+    # header alone, before the payload is even read.
+    enable_url_filtering: bool = False
+    # Public suffixes to keep (e.g. "com", "co.uk"); empty keeps all.
+    accepted_tlds: Tuple[str, ...] = ()
+    # Subdomains to keep (e.g. "www", ""); empty keeps all.
+    accepted_subdomains: Tuple[str, ...] = ()
+    # Keep only URLs whose path contains one of these segments
+    # (e.g. "blog", "news"); empty keeps all.
+    accepted_path_segments: Tuple[str, ...] = ()
+
+    # --- Output ---------------------------------------------------------
+    # "console" prints records to stdout, "dump" writes files.
+    output_mode: str = "console"
+    # Wait for Enter between console records.  Off by default so batch
+    # and profiling runs never block on a keypress.
+    interactive_mode: bool = False
+    output_directory: str = "output"
+    # Compression for dump files: "zstd" (multithreaded, ~10x faster
+    # than zlib at similar ratios) when the zstandard package is
+    # installed, or "gzip".
+    output_codec: str = "gzip"
+    preview_text_chars: int = 500
+    # Dump the cleaned HTML markup instead of the extracted text.
+    dump_with_html_tags: bool = False
+    # Indent dumped markup for readability.  Costs a full reformat per
+    # record (and selectolax trees are always emitted raw), so it is
+    # off by default.
+    pretty_output: bool = False
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        global _toml_source
+        if _toml_source is None:
+            _toml_source = TomlConfigSettingsSource(settings_cls)
+        return (
+            init_settings,
+            env_settings,
+            _toml_source,
+            file_secret_settings,
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> PyRexSettings:
+    """Load the settings object on first use and cache it for the process."""
+    try:
+        return PyRexSettings()
+    except Exception as error:
+        print(f"Warning: could not load settings ({error}), falling back to defaults.")
+        return PyRexSettings.model_construct()
+
+
+def __getattr__(name: str):
+    # Lazy back-compat alias so ``from config.settings import settings``
+    # keeps working without paying for validation at import time.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,18 @@
+"""Shared pytest fixtures for the PyRex test suite."""
+
+import pytest
+
+import pyrex_language
+from pyrex_language import detect_and_filter_languages
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_detector():
+    """Load the lingua detector models once for the whole session.
+
+    Every test file shares the process-wide detector singleton, so
+    warming it here means the model load is paid exactly once no matter
+    which files run or in what order.
+    """
+    if pyrex_language.LINGUA_AVAILABLE:
+        detect_and_filter_languages("warmup " * 50)
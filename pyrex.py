@@ -0,0 +1,923 @@
+"""PyRex: turn WARC files from CommonCrawl snapshots into clean text.
+
+Entry point and per-record pipeline: read WARC records, decode and repair
+their encoding, strip markup, filter, and hand the survivors to the
+configured output.
+"""
+
+import argparse
+import contextlib
+import functools
+import gzip
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+
+try:
+    # Cython WARC parser; filters and parses records in C before they
+    # ever cross into Python.
+    from fastwarc.warc import ArchiveIterator as FastArchiveIterator
+    from fastwarc.warc import WarcRecordType
+    FASTWARC_AVAILABLE = True
+except ImportError:
+    FASTWARC_AVAILABLE = False
+
+from warcio.archiveiterator import ArchiveIterator
+
+try:
+    # Intel ISA-L SIMD-accelerated gzip, ~3x faster than zlib.
+    from isal import igzip
+    IGZIP_AVAILABLE = True
+except ImportError:
+    IGZIP_AVAILABLE = False
+
+try:
+    from isal import igzip_threaded
+    IGZIP_THREADED_AVAILABLE = True
+except ImportError:
+    IGZIP_THREADED_AVAILABLE = False
+
+try:
+    # Parallel gzip decoder: prefetches and decompresses chunks across a
+    # thread pool, scaling the gzip stage with core count.
+    import rapidgzip
+    RAPIDGZIP_AVAILABLE = True
+except ImportError:
+    RAPIDGZIP_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+from config.settings import settings
+from pyrex_basic import SCAN_AVAILABLE, decode_and_normalize, fix_text_encoding, scan_flags
+from pyrex_html import (
+    extract_text_fast,
+    extract_text_streaming,
+    parse_html,
+    pass_minimal_html,
+)
+from pyrex_language import (
+    detect_and_filter_languages,
+    detect_and_filter_languages_batch,
+)
+from pyrex_url import parse_and_filter_url
+
+# HTML sniff over raw payload bytes: matching in place avoids the
+# strip/lower/slice copies of the sampled head.
+_HTML_SNIFF = re.compile(rb"\s*<(!doctype\s+html\b|html\b)", re.I)
+
+try:
+    # Compiled sniff: a C byte loop with no regex machinery or match
+    # object allocation (python setup.py build_ext --inplace).
+    from pyrex_scan import is_html_prefix as _is_html_prefix
+except ImportError:
+    _is_html_prefix = None
+
+
+def _looks_like_html(payload: bytes) -> bool:
+    """Sniff raw payload bytes for an HTML prefix (doctype tokens are ASCII)."""
+    if _is_html_prefix is not None:
+        return _is_html_prefix(payload)
+    return _HTML_SNIFF.match(payload, 0, _HTML_DETECTION_SAMPLE) is not None
+
+
+# Skip messages are batched so that at high record rates the pipeline
+# is not serialized on one stdout write per skipped record; dump mode
+# suppresses them entirely since nobody watches the terminal there.
+_SKIP_LOG_CAPACITY = 1000
+_skip_log: list = []
+
+
+def _log_skip(message: str) -> None:
+    """Queue a per-record skip message for batched output."""
+    if _OUTPUT_MODE == "dump":
+        return
+    _skip_log.append(message)
+    if len(_skip_log) >= _SKIP_LOG_CAPACITY:
+        _flush_skip_log()
+
+
+def _flush_skip_log() -> None:
+    """Write any queued skip messages in one stdout call."""
+    if _skip_log:
+        sys.stdout.write("\n".join(_skip_log) + "\n")
+        _skip_log.clear()
+
+
+# Flags sentinel marking a payload whose text was already extracted by
+# the streaming parser: an empty tuple, distinct from both None (no
+# scanner ran) and any real scanner verdict, and cheap to pickle.
+_STREAMED_FLAGS: Tuple[bool, ...] = ()
+
+# Chunk size for feeding oversized records through the streaming parser.
+_STREAM_CHUNK = 1 << 16
+
+# Shortened language-detection sample for Latin-script documents.
+_LATIN_SAMPLE_CHARS = 512
+
+# Markup tags, for the pre-parse visible-length upper bound.  A "<"
+# only opens a tag when followed by a name, end-tag, comment or PI
+# character (the HTML5 tokenizer rule), so a raw "<" in visible text
+# ("2 < 3") is counted as text rather than swallowing what follows.
+_TAG_RE = re.compile(r"<[a-zA-Z/!?][^>]*>")
+_TAG_RE_BYTES = re.compile(rb"<[a-zA-Z/!?][^>]*>")
+
+
+def _visible_upper_bound(payload: Union[str, bytes]) -> int:
+    """Upper-bound the visible text length without parsing.
+
+    Everything outside angle-bracket tags is counted, plus one
+    character per tag: extraction joins text nodes with a single space,
+    so each tag boundary can contribute a separator the raw bytes never
+    show.  Visible text can only be shorter than this (head/script/
+    style bodies and entities still count here), so a result below the
+    minimum length is a safe reject that saves the whole parse.
+    """
+    hidden = 0
+    tags = 0
+    if isinstance(payload, bytes):
+        for bytes_match in _TAG_RE_BYTES.finditer(payload):
+            hidden += bytes_match.end() - bytes_match.start()
+            tags += 1
+    else:
+        for str_match in _TAG_RE.finditer(payload):
+            hidden += str_match.end() - str_match.start()
+            tags += 1
+    return len(payload) - hidden + tags
+
+_CHARSET_PARAM_RE = re.compile(r"charset=([\w-]+)")
+
+
+def _charset_from_content_type(content_type: str) -> Optional[str]:
+    """Charset parameter of a Content-Type header value, if the server sent one."""
+    match = _CHARSET_PARAM_RE.search(content_type)
+    return match.group(1) if match else None
+
+
+def _iter_stream_chunks(first: bytes, stream) -> Iterator[bytes]:
+    """Yield the already-read first chunk, then the rest of the stream."""
+    yield first
+    while True:
+        chunk = stream.read(_STREAM_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+
+class RecordMeta(NamedTuple):
+    """Raw metadata of one WARC record.
+
+    A slotted tuple of the header values instead of a list of seven
+    preformatted strings: building one costs a single allocation, and
+    the f-string formatting is deferred to the output stage so records
+    filtered out along the way never pay for it.
+    """
+
+    idx: int
+    rec_type: str
+    uri: str
+    date: str
+    ctype: str
+    clen: str
+    rid: str
+
+    def as_lines(self) -> Tuple[str, ...]:
+        """Format the metadata for output."""
+        return (
+            f"Record #{self.idx}",
+            f"WARC-Type: {self.rec_type}",
+            f"WARC-Target-URI: {self.uri}",
+            f"WARC-Date: {self.date}",
+            f"Content-Type: {self.ctype}",
+            f"Content-Length: {self.clen}",
+            f"WARC-Record-ID: {self.rid}",
+        )
+
+
+@functools.lru_cache(maxsize=8192)
+def _nfc_small(value: str) -> str:
+    """NFC-normalize a short, frequently repeated string through a cache.
+
+    Header values (URIs, content types) repeat heavily across records of
+    the same site, so the cache turns most normalizations into a dict
+    hit.  Never use this for payloads: hashing a multi-megabyte cache
+    key costs more than normalizing it.
+    """
+    return value if value.isascii() else unicodedata.normalize("NFC", value)
+
+
+def _passes_language_filter(visible_text: str) -> bool:
+    """Run the optional language filter on already-extracted text.
+
+    The filter reuses the text the pipeline extracted anyway, so no
+    second parse or extraction happens for language detection.
+    """
+    if not _ENABLE_LANGUAGE_FILTERING:
+        return True
+    keep, _ = detect_and_filter_languages(_language_sample(visible_text))
+    return keep
+
+
+def _language_sample(visible_text: str) -> str:
+    """Cut the slice of extracted text that goes into language detection.
+
+    Detection converges within a few KiB; feeding whole documents is
+    pure waste, so only the leading sample crosses into the detector.
+    Adaptively shorter still: an all-ASCII head means a Latin-script
+    document, where a few hundred characters already saturate accuracy.
+    The sniff is one isascii() flag check; mixed-script documents keep
+    the full budget.
+    """
+    sample = visible_text[:_LANGUAGE_DETECTION_CHARS]
+    if len(sample) > _LATIN_SAMPLE_CHARS and visible_text[:256].isascii():
+        return visible_text[:_LATIN_SAMPLE_CHARS]
+    return sample
+
+
+def _passes_url_filter(uri: str) -> bool:
+    """Run the optional URL filter on a record's target URI."""
+    if not _ENABLE_URL_FILTERING:
+        return True
+    keep, _ = parse_and_filter_url(uri)
+    return keep
+
+
+def process_record(
+    record_data: RecordMeta,
+    html_payload: Union[str, bytes],
+    flags: Optional[Tuple[bool, ...]] = None,
+    apply_language_filter: bool = True,
+) -> Optional[dict]:
+    """Run one decoded HTML payload through repair, parse and filtering.
+
+    ``flags`` optionally carries the compiled byte scanner's verdict on
+    the raw payload, or ``_STREAMED_FLAGS`` when ``html_payload`` is
+    text the streaming parser already extracted.  Pure-ASCII payloads
+    arrive as raw bytes: every parser backend takes bytes directly, so
+    they skip the bytes-to-str decode (and selectolax's internal
+    re-encode) entirely.  ``apply_language_filter=False`` defers
+    language filtering to the caller (the chunk worker batches it).
+    Returns the processed record as a dict, or None when the document
+    is filtered out.
+    """
+    if flags == _STREAMED_FLAGS:
+        # Streamed payloads are always text the extractor produced.
+        assert isinstance(html_payload, str)
+        visible_text = fix_text_encoding(html_payload)
+        if len(visible_text) < _MINIMAL_TEXT_LENGTH:
+            return None
+        if apply_language_filter and not _passes_language_filter(visible_text):
+            return None
+        if not visible_text.isascii() and not unicodedata.is_normalized("NFC", visible_text):
+            visible_text = unicodedata.normalize("NFC", visible_text)
+        return {
+            "record_data": record_data,
+            "parsed_html": None,
+            "visible_text": visible_text,
+        }
+
+    # Text-only fast path, cheapest gate first: parse and extract
+    # before any repair, discard short or wrong-language documents,
+    # and only then run mojibake/entity repair - on the extracted text
+    # rather than the full markup.  (The parser resolves entities
+    # itself, so repairing after extraction is equivalent; discarded
+    # documents never pay for ftfy or unescape at all.)
+    # Pre-parse gate: when even the tag-stripped upper bound falls
+    # short of the minimum, the parse can never produce enough visible
+    # text; rejecting here costs one regex pass instead of a tree.
+    # With scanner flags present the bound was already checked in
+    # _process_batch from the fused byte scan.
+    if flags is None and _visible_upper_bound(html_payload) < _MINIMAL_TEXT_LENGTH:
+        return None
+
+    if not _DUMP_WITH_HTML_TAGS:
+        parsed_html = None
+        visible_text = extract_text_fast(html_payload)
+        if len(visible_text) < _MINIMAL_TEXT_LENGTH:
+            return None
+        if apply_language_filter and not _passes_language_filter(visible_text):
+            return None
+        visible_text = fix_text_encoding(visible_text, flags)
+    else:
+        # Dump-with-markup path: the tree itself is output, so repair
+        # must run on the full payload before parsing.
+        if isinstance(html_payload, bytes):
+            # Only pure-ASCII payloads travel as bytes; the decode is a
+            # straight copy.
+            html_payload = html_payload.decode("ascii", errors="replace")
+        repaired_payload = fix_text_encoding(html_payload, flags)
+        parsed_html = parse_html(repaired_payload)
+        keep, visible_text = pass_minimal_html(parsed_html)
+        if not keep:
+            return None
+        if apply_language_filter and not _passes_language_filter(visible_text):
+            return None
+    # NFC is the identity on ASCII (str.isascii() is a flag check), and
+    # is_normalized() runs the Unicode Quick Check in C without
+    # allocating, so already-canonical text skips the copy entirely.
+    if not visible_text.isascii() and not unicodedata.is_normalized("NFC", visible_text):
+        visible_text = unicodedata.normalize("NFC", visible_text)
+
+    return {
+        "record_data": record_data,
+        "parsed_html": parsed_html,
+        "visible_text": visible_text,
+    }
+
+
+# Snapshot of the settings fields read per record: module-level globals
+# are one LOAD_GLOBAL instead of an attribute lookup (with descriptor
+# dispatch) on the settings object for every record.  Demo code that
+# mutates settings at runtime must call refresh_settings_cache().
+_HTML_DETECTION_SAMPLE = settings.html_detection_sample
+_OUTPUT_MODE = settings.output_mode
+_DUMP_WITH_HTML_TAGS = settings.dump_with_html_tags
+_PREVIEW_TEXT_CHARS = settings.preview_text_chars
+_STREAMING_THRESHOLD = settings.streaming_threshold_bytes
+_MINIMAL_TEXT_LENGTH = settings.minimal_text_length
+_MINIMAL_HTML_BYTES = settings.minimal_html_bytes
+_ENABLE_LANGUAGE_FILTERING = settings.enable_language_filtering
+_LANGUAGE_DETECTION_CHARS = settings.language_detection_chars
+_ENABLE_URL_FILTERING = settings.enable_url_filtering
+_INTERACTIVE_MODE = settings.interactive_mode
+
+
+def refresh_settings_cache() -> None:
+    """Re-snapshot the settings fields cached at module level."""
+    global _HTML_DETECTION_SAMPLE, _OUTPUT_MODE, _DUMP_WITH_HTML_TAGS, \
+        _PREVIEW_TEXT_CHARS, _STREAMING_THRESHOLD, _MINIMAL_TEXT_LENGTH, \
+        _MINIMAL_HTML_BYTES, _ENABLE_LANGUAGE_FILTERING, \
+        _LANGUAGE_DETECTION_CHARS, _ENABLE_URL_FILTERING, _INTERACTIVE_MODE
+    _HTML_DETECTION_SAMPLE = settings.html_detection_sample
+    _OUTPUT_MODE = settings.output_mode
+    _DUMP_WITH_HTML_TAGS = settings.dump_with_html_tags
+    _PREVIEW_TEXT_CHARS = settings.preview_text_chars
+    _STREAMING_THRESHOLD = settings.streaming_threshold_bytes
+    _MINIMAL_TEXT_LENGTH = settings.minimal_text_length
+    _MINIMAL_HTML_BYTES = settings.minimal_html_bytes
+    _ENABLE_LANGUAGE_FILTERING = settings.enable_language_filtering
+    _LANGUAGE_DETECTION_CHARS = settings.language_detection_chars
+    _ENABLE_URL_FILTERING = settings.enable_url_filtering
+    _INTERACTIVE_MODE = settings.interactive_mode
+
+
+def _serialize_parsed_html(parsed_html) -> str:
+    """Serialize a parsed tree back to HTML markup.
+
+    Raw serialization by default: pretty-printing reformats the whole
+    DOM with per-node indent strings and is opt-in via
+    ``settings.pretty_output`` (lxml and bs4 trees only - selectolax
+    has no pretty printer and is always emitted raw).
+    """
+    markup = getattr(parsed_html, "html", None)  # selectolax
+    if isinstance(markup, str):
+        return markup
+    if hasattr(parsed_html, "getroottree"):  # lxml
+        from lxml import etree
+        return etree.tostring(
+            parsed_html, encoding="unicode", pretty_print=settings.pretty_output
+        )
+    if settings.pretty_output:
+        return parsed_html.prettify()
+    return str(parsed_html)
+
+
+def _process_record_worker(
+    args: Tuple[RecordMeta, Union[str, bytes], Optional[Tuple[bool, ...]]],
+    apply_language_filter: bool = True,
+) -> Optional[dict]:
+    """Pool worker: run process_record and return a picklable result.
+
+    Parsed trees do not pickle cheaply, so the tree is dropped and only
+    the metadata plus the content string to be dumped cross back over
+    the process boundary.
+    """
+    record_data, html_payload, flags = args
+    processed = process_record(record_data, html_payload, flags, apply_language_filter)
+    if processed is None:
+        return None
+    parsed_html = processed.pop("parsed_html")
+    if _DUMP_WITH_HTML_TAGS and parsed_html is not None:
+        processed["content"] = _serialize_parsed_html(parsed_html)
+    else:
+        processed["content"] = processed["visible_text"]
+    return processed
+
+
+# Records per worker task, and how many tasks may be in flight at once
+# (per worker).  Together these bound the queue between the WARC reader
+# and the pool, so reading never runs unboundedly ahead of processing.
+_CHUNK_SIZE = 16
+_MAX_PENDING_PER_WORKER = 2
+
+# Completed records waiting for the dump writer thread.
+_WRITER_QUEUE_SIZE = 64
+
+# Record separators, materialized once instead of per record.
+_EQ80 = "=" * 80
+_DASH40 = "-" * 40
+_RECORD_HEADER = _EQ80 + "\nWARC Record:\n" + _DASH40 + "\n"
+
+
+def _writer_loop(writer_queue: "queue.Queue", dump_file, failure: list) -> None:
+    """Writer thread: drain processed records and dump them until None.
+
+    A write error (disk full, closed handle) is stashed in ``failure``
+    for the submission loop to re-raise; the queue keeps draining so
+    the submitting side never blocks on a full queue behind a dead
+    writer.
+    """
+    while True:
+        processed_data = writer_queue.get()
+        if processed_data is None:
+            return
+        if not failure:
+            try:
+                output_dump(processed_data, dump_file)
+            except Exception as error:  # noqa: BLE001 - re-raised by the main loop
+                failure.append(error)
+
+
+def _process_chunk_worker(chunk: list) -> list:
+    """Pool worker: process one chunk of records in a single task.
+
+    With language filtering on, detection is deferred out of
+    process_record and run once for the whole chunk through lingua's
+    batch call, so the chunk pays one FFI crossing instead of one per
+    record.
+    """
+    if not _ENABLE_LANGUAGE_FILTERING:
+        return [_process_record_worker(args) for args in chunk]
+    results = [
+        _process_record_worker(args, apply_language_filter=False) for args in chunk
+    ]
+    samples = [
+        _language_sample(processed["visible_text"])
+        for processed in results
+        if processed is not None
+    ]
+    verdicts = iter(detect_and_filter_languages_batch(samples))
+    return [
+        processed if processed is None or next(verdicts)[0] else None
+        for processed in results
+    ]
+
+
+def _open_dump_file(warc_file_path: str, ctx: contextlib.ExitStack):
+    """Open the dump file for one WARC once, with a 1 MiB write buffer.
+
+    ``settings.output_codec`` picks the compressor: zstd runs an order
+    of magnitude faster than zlib at a comparable ratio and compresses
+    on its own worker threads (threads=-1), so the writer thread is not
+    the dump bottleneck; gzip remains the default for compatibility.
+    """
+    output_dir = Path(settings.output_directory)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    warc_basename = Path(warc_file_path).name
+    if warc_basename.endswith(".gz"):
+        warc_basename = warc_basename[: -len(".gz")]
+    use_zstd = settings.output_codec == "zstd" and ZSTD_AVAILABLE
+    suffix = ".txt.zst" if use_zstd else ".txt.gz"
+    output_file = output_dir / (warc_basename + suffix)
+    raw = ctx.enter_context(open(output_file, "ab"))
+    # Entered between raw and the compressor so the LIFO close order
+    # flushes it after the compressor's trailer but before raw closes.
+    buffered = ctx.enter_context(io.BufferedWriter(raw, buffer_size=1 << 20))
+    if use_zstd:
+        compressor = zstandard.ZstdCompressor(level=3, threads=-1)
+        zstd_stream = ctx.enter_context(compressor.stream_writer(buffered))
+        return ctx.enter_context(io.TextIOWrapper(zstd_stream, encoding="utf-8"))
+    gzip_stream = ctx.enter_context(gzip.GzipFile(fileobj=buffered, mode="wb"))
+    return ctx.enter_context(io.TextIOWrapper(gzip_stream, encoding="utf-8"))
+
+
+def output_dump(processed_data: dict, f) -> None:
+    """Append one processed record to an already-open dump file.
+
+    The whole record is joined into one string and written with a
+    single call, so the TextIOWrapper/compressor stack is entered once
+    per record instead of once per line.
+    """
+    meta = "\n".join(processed_data["record_data"].as_lines())
+    f.write(
+        _RECORD_HEADER
+        + meta
+        + "\n"
+        + _DASH40
+        + "\n"
+        + processed_data["content"]
+        + "\n\n"
+    )
+
+
+def output_console(processed_data: dict) -> None:
+    """Show one processed record on the console.
+
+    The record renders as one joined string and one stdout write
+    instead of a dozen print calls; ``settings.interactive_mode`` waits
+    for Enter between records, and is off by default so batch and
+    profiling runs never block on a keypress.
+    """
+    visible_text = processed_data["visible_text"]
+    parts = [_EQ80, "WARC Record:", _DASH40]
+    parts.extend(processed_data["record_data"].as_lines())
+    parts.append(_DASH40)
+    parts.append(f"Text preview ({len(visible_text)} chars):")
+    parts.append(visible_text[:_PREVIEW_TEXT_CHARS])
+    sys.stdout.write("\n".join(parts) + "\n")
+
+    if _INTERACTIVE_MODE:
+        input("Press Enter for the next record (Ctrl+C to abort)...")
+
+
+def _open_warc_stream(warc_file_path: str, ctx: contextlib.ExitStack):
+    """Open a WARC file as an uncompressed byte stream.
+
+    For .warc.gz input the decompressor is chosen per
+    ``settings.decompressor``: rapidgzip decodes chunks in parallel
+    in-process, a pigz subprocess decompresses on separate cores in
+    parallel with parsing, threaded isal is the fastest single-stream
+    in-process option, and zlib's GzipFile is the fallback.
+    """
+    if not warc_file_path.endswith(".gz"):
+        return ctx.enter_context(open(warc_file_path, "rb", buffering=1 << 20))
+
+    choice = settings.decompressor
+    if choice in ("auto", "rapidgzip") and RAPIDGZIP_AVAILABLE:
+        return ctx.enter_context(
+            rapidgzip.open(warc_file_path, parallelization=os.cpu_count())
+        )
+    if choice in ("auto", "pigz") and shutil.which("pigz"):
+        proc = ctx.enter_context(
+            subprocess.Popen(
+                ["pigz", "-dc", warc_file_path],
+                stdout=subprocess.PIPE,
+                bufsize=1 << 20,
+            )
+        )
+        return proc.stdout
+    if choice in ("auto", "igzip") and IGZIP_THREADED_AVAILABLE:
+        return ctx.enter_context(igzip_threaded.open(warc_file_path, "rb"))
+
+    raw = ctx.enter_context(open(warc_file_path, "rb", buffering=1 << 20))
+    gz = igzip.IGzipFile(fileobj=raw) if IGZIP_AVAILABLE else gzip.GzipFile(fileobj=raw)
+    return io.BufferedReader(gz, buffer_size=1 << 20)
+
+
+# How many records are staged together so each processing pass (byte
+# scan, decode) runs back-to-back over a warm cache instead of
+# interleaved with WARC iteration.
+_BATCH_SIZE = 32
+
+
+def _record_meta_fastwarc(record_count: int, headers, http_headers) -> RecordMeta:
+    """Collect the metadata of one FastWARC record."""
+    return RecordMeta(
+        record_count,
+        headers.get("WARC-Type", "response"),
+        _nfc_small(headers.get("WARC-Target-URI", "N/A")),
+        headers.get("WARC-Date", "N/A"),
+        _nfc_small(http_headers.get("Content-Type", "N/A")) if http_headers else "N/A",
+        headers.get("Content-Length", "N/A"),
+        headers.get("WARC-Record-ID", "N/A"),
+    )
+
+
+def _iter_raw_html_fastwarc(
+    stream, stats: dict
+) -> Iterator[Tuple[RecordMeta, Union[str, bytes], bool, Optional[str]]]:
+    """Yield (record_data, payload or text, streamed, charset hint) tuples.
+
+    FastWARC drops non-response records inside the C++ iterator, so the
+    ``rec_type`` branch never runs in Python here; ``stats["records"]``
+    therefore counts response records only on this path.  Records above
+    ``settings.streaming_threshold_bytes`` are fed chunkwise through
+    the streaming text extractor instead of being materialized.
+    """
+    records = FastArchiveIterator(
+        stream, record_types=WarcRecordType.response, parse_http=True
+    )
+    for record in records:
+        stats["records"] += 1
+        record_count = stats["records"]
+
+        http_headers = record.http_headers
+        content_type = (http_headers.get("Content-Type") or "").lower() if http_headers else ""
+        if content_type and "html" not in content_type:
+            _log_skip(f"Skipping record #{record_count}: not HTML ({content_type})")
+            continue
+
+        if _ENABLE_URL_FILTERING and not _passes_url_filter(
+            record.headers.get("WARC-Target-URI") or ""
+        ):
+            _log_skip(f"Skipping record #{record_count}: URI filtered out")
+            continue
+
+        try:
+            declared_len = int(record.headers.get("Content-Length") or 0)
+        except ValueError:
+            declared_len = 0
+        if declared_len > _STREAMING_THRESHOLD:
+            reader = record.reader
+            first = reader.read(_STREAM_CHUNK)
+            if not first:
+                continue
+            if "html" not in content_type and not _looks_like_html(first):
+                _log_skip(f"Skipping record #{record_count}: not HTML (no content type)")
+                continue
+            text = extract_text_streaming(
+                _iter_stream_chunks(first, reader),
+                _charset_from_content_type(content_type) or "utf-8",
+            )
+            yield _record_meta_fastwarc(record_count, record.headers, http_headers), text, True, None
+            continue
+
+        payload = record.reader.read()
+        if len(payload) < _MINIMAL_HTML_BYTES:
+            # Too small to ever pass the visible-text filter; skip
+            # before paying for sniffing and decoding.
+            continue
+
+        if "html" not in content_type:
+            if not _looks_like_html(payload):
+                _log_skip(f"Skipping record #{record_count}: not HTML (no content type)")
+                continue
+
+        yield (
+            _record_meta_fastwarc(record_count, record.headers, http_headers),
+            payload,
+            False,
+            _charset_from_content_type(content_type),
+        )
+
+
+def _record_meta_warcio(record_count: int, record) -> RecordMeta:
+    """Collect the metadata of one warcio record."""
+    return RecordMeta(
+        record_count,
+        record.rec_type,
+        _nfc_small(record.rec_headers.get_header("WARC-Target-URI", "N/A")),
+        record.rec_headers.get_header("WARC-Date", "N/A"),
+        _nfc_small(record.http_headers.get_header("Content-Type", "N/A")) if record.http_headers else "N/A",
+        record.rec_headers.get_header("Content-Length", "N/A"),
+        record.rec_headers.get_header("WARC-Record-ID", "N/A"),
+    )
+
+
+def _iter_raw_html(
+    records, stats: dict
+) -> Iterator[Tuple[RecordMeta, Union[str, bytes], bool, Optional[str]]]:
+    """Yield (record_data, payload or text, streamed, charset hint) tuples."""
+    for record in records:
+        stats["records"] += 1
+        record_count = stats["records"]
+        if record.rec_type != "response":
+            continue
+
+        content_type = ""
+        if record.http_headers:
+            content_type = (record.http_headers.get_header("Content-Type") or "").lower()
+        if content_type and "html" not in content_type:
+            # Header already says non-HTML: skip without materializing
+            # the payload at all.
+            _log_skip(f"Skipping record #{record_count}: not HTML ({content_type})")
+            continue
+
+        if _ENABLE_URL_FILTERING and not _passes_url_filter(
+            record.rec_headers.get_header("WARC-Target-URI") or ""
+        ):
+            _log_skip(f"Skipping record #{record_count}: URI filtered out")
+            continue
+
+        try:
+            declared_len = int(record.rec_headers.get_header("Content-Length") or 0)
+        except ValueError:
+            declared_len = 0
+        if declared_len > _STREAMING_THRESHOLD:
+            # Oversized record: extract text incrementally instead of
+            # holding payload bytes, decoded string and tree at once.
+            stream = record.content_stream()
+            first = stream.read(_STREAM_CHUNK)
+            if not first:
+                continue
+            if "html" not in content_type and not _looks_like_html(first):
+                _log_skip(f"Skipping record #{record_count}: not HTML (no content type)")
+                continue
+            text = extract_text_streaming(
+                _iter_stream_chunks(first, stream),
+                _charset_from_content_type(content_type) or "utf-8",
+            )
+            yield _record_meta_warcio(record_count, record), text, True, None
+            continue
+
+        payload = record.content_stream().read()
+        if len(payload) < _MINIMAL_HTML_BYTES:
+            # Too small to ever pass the visible-text filter; skip
+            # before paying for sniffing and decoding.
+            continue
+
+        if "html" not in content_type:
+            # Sniff on the raw bytes (doctype tokens are ASCII) so
+            # non-HTML records never pay for charset detection/decoding.
+            if not _looks_like_html(payload):
+                _log_skip(f"Skipping record #{record_count}: not HTML (no content type)")
+                continue
+
+        # Record metadata is only formatted for records that survive the
+        # cheap gates above; skipped records never pay for the f-strings
+        # and header lookups.
+        yield (
+            _record_meta_warcio(record_count, record),
+            payload,
+            False,
+            _charset_from_content_type(content_type),
+        )
+
+
+def _process_batch(
+    batch: List[Tuple[RecordMeta, bytes, Optional[str]]]
+) -> List[Tuple[RecordMeta, Union[str, bytes], Optional[Tuple[bool, ...]]]]:
+    """Run the byte-scan and decode stages over one batch, pass by pass."""
+    payloads = [payload for _, payload, _ in batch]
+    if SCAN_AVAILABLE:
+        # The fused scan's third field (pure ASCII) lets clean ASCII
+        # payloads skip decoding altogether - they stay bytes, which
+        # every parser backend accepts directly; the header charset
+        # hint spares non-ASCII ones the in-document sniff.  Its fourth
+        # field bounds the visible text length, so documents that can
+        # never pass the length filter drop out before decoding.
+        all_flags = list(map(scan_flags, payloads))
+        batch = [
+            entry
+            for entry, flags in zip(batch, all_flags)
+            if flags[3] >= _MINIMAL_TEXT_LENGTH
+        ]
+        all_flags = [flags for flags in all_flags if flags[3] >= _MINIMAL_TEXT_LENGTH]
+        decoded = [
+            payload if flags[2] else decode_and_normalize(payload, False, charset)
+            for (_, payload, charset), flags in zip(batch, all_flags)
+        ]
+    else:
+        all_flags = [None] * len(batch)
+        decoded = [
+            decode_and_normalize(payload, None, charset)
+            for _, payload, charset in batch
+        ]
+    return [
+        (record_data, html_payload, flags)
+        for (record_data, _, _), html_payload, flags in zip(batch, decoded, all_flags)
+    ]
+
+
+def _iter_html_payloads(
+    raw_records: Iterator[Tuple[RecordMeta, Union[str, bytes], bool, Optional[str]]]
+) -> Iterator[Tuple[RecordMeta, Union[str, bytes], Optional[Tuple[bool, ...]]]]:
+    """Yield (record_data, decoded payload, scan flags) in staged batches.
+
+    Stream-extracted records bypass the scan/decode batch (their text
+    is final) and are emitted in place to preserve record order.
+    """
+    batch: List[Tuple[RecordMeta, bytes, Optional[str]]] = []
+    for record_data, payload, streamed, charset in raw_records:
+        if streamed:
+            if batch:
+                yield from _process_batch(batch)
+                batch = []
+            yield record_data, payload, _STREAMED_FLAGS
+            continue
+        # Only streamed records carry str; everything batched is bytes.
+        assert isinstance(payload, bytes)
+        batch.append((record_data, payload, charset))
+        if len(batch) >= _BATCH_SIZE:
+            yield from _process_batch(batch)
+            batch = []
+    if batch:
+        yield from _process_batch(batch)
+
+
+def read_warc_file(warc_file_path: str) -> None:
+    """Iterate one WARC file and run every response record through the pipeline.
+
+    Records are independent, so in dump mode they are processed by a
+    process pool while the main process keeps reading the WARC and
+    writing results in submission order; interactive console mode stays
+    single-threaded.
+    """
+    stats = {"records": 0, "processed": 0}
+
+    with contextlib.ExitStack() as ctx:
+        stream = _open_warc_stream(warc_file_path, ctx)
+        if FASTWARC_AVAILABLE:
+            raw_records = _iter_raw_html_fastwarc(stream, stats)
+        else:
+            raw_records = _iter_raw_html(ArchiveIterator(stream), stats)
+        payloads = _iter_html_payloads(raw_records)
+
+        if _OUTPUT_MODE == "dump":
+            dump_file = _open_dump_file(warc_file_path, ctx)
+            workers = os.cpu_count() or 1
+            max_pending = workers * _MAX_PENDING_PER_WORKER
+            # The reader process may already be running decompressor
+            # threads (rapidgzip, pigz); forkserver starts each worker
+            # from a clean helper process instead of forking that
+            # threaded state.
+            mp_context: multiprocessing.context.BaseContext
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                mp_context = multiprocessing.get_context("forkserver")
+            else:
+                mp_context = multiprocessing.get_context()
+            # A single writer thread drains completed records, so disk
+            # writes overlap with pool result collection instead of
+            # stalling it; the bounded queue keeps backpressure.
+            writer_queue: queue.Queue = queue.Queue(maxsize=_WRITER_QUEUE_SIZE)
+            writer_failure: list = []
+            writer = threading.Thread(
+                target=_writer_loop,
+                args=(writer_queue, dump_file, writer_failure),
+                daemon=True,
+            )
+            writer.start()
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=mp_context
+                ) as executor:
+                    # Executor.map would consume the whole payload iterator
+                    # up front; submitting chunk futures through a bounded
+                    # deque keeps at most max_pending chunks in flight while
+                    # still writing results in record order.
+                    pending: deque = deque()
+                    payload_iter = iter(payloads)
+                    while True:
+                        # Surface a dead writer (disk full, closed
+                        # handle) instead of queueing records it will
+                        # discard.
+                        if writer_failure:
+                            raise writer_failure[0]
+                        chunk = list(itertools.islice(payload_iter, _CHUNK_SIZE))
+                        if chunk:
+                            pending.append(
+                                executor.submit(_process_chunk_worker, chunk)
+                            )
+                        elif not pending:
+                            break
+                        if not chunk or len(pending) >= max_pending:
+                            for processed_data in pending.popleft().result():
+                                if processed_data is not None:
+                                    stats["processed"] += 1
+                                    writer_queue.put(processed_data)
+            finally:
+                # Sentinel and join before the ExitStack closes the
+                # dump file under the writer.
+                writer_queue.put(None)
+                writer.join()
+            if writer_failure:
+                # The writer died while draining the tail of the queue.
+                raise writer_failure[0]
+        else:
+            for record_data, html_payload, flags in payloads:
+                processed_data = process_record(record_data, html_payload, flags)
+                if processed_data is not None:
+                    stats["processed"] += 1
+                    _flush_skip_log()
+                    output_console(processed_data)
+                else:
+                    _log_skip("Skipping record: filtered out")
+
+    _flush_skip_log()
+    print(f"Done: {stats['processed']} of {stats['records']} records kept.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Process a WARC file into clean text (see config/settings.toml)."
+    )
+    parser.add_argument("warc_file", help="path to a .warc or .warc.gz file")
+    args = parser.parse_args()
+
+    if not Path(args.warc_file).is_file():
+        print(f"Error: no such file: {args.warc_file}")
+        sys.exit(1)
+
+    try:
+        read_warc_file(args.warc_file)
+    except KeyboardInterrupt:
+        print("\nAborted.")
+
+
+if __name__ == "__main__":
+    main()
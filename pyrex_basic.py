@@ -0,0 +1,203 @@
+"""Basic per-record text processing: charset detection, decoding and repair.
+
+These helpers run once per WARC response record and deliberately keep no
+state between calls.
+"""
+
+import codecs
+import html
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+try:
+    # C binding of uchardet, 20-100x faster than pure-Python chardet.
+    from cchardet import detect as _detect_encoding
+except ImportError:
+    try:
+        from charset_normalizer import detect as _detect_encoding
+    except ImportError:
+        from chardet import detect as _detect_encoding
+
+try:
+    import ftfy
+    FTFY_AVAILABLE = True
+    # Entity unescaping fused into ftfy's single walk instead of a
+    # second html.unescape pass; explanations are never read, and NFC
+    # is left to the pipeline's guarded normalization step so it is not
+    # paid twice.
+    _FTFY_CONFIG = ftfy.TextFixerConfig(
+        unescape_html=True, normalization=None, explain=False
+    )
+except ImportError:
+    FTFY_AVAILABLE = False
+
+from config.settings import settings
+
+# Declared charset in an HTML <meta> or XML prolog, e.g. charset="utf-8".
+_CHARSET_RE = re.compile(rb'charset\s*=\s*["\']?([\w-]+)', re.I)
+
+# Leading characters of the UTF-8-as-Latin-1 mojibake bigrams ftfy fixes
+# (e.g. "Ã¤" for "ä", "â€œ" for a curly quote).
+_MOJIBAKE_RE = re.compile(r"[ÃÂâ]")
+# Numeric or named HTML entities, e.g. &amp; or &#228;.
+_ENTITY_RE = re.compile(r"&[a-zA-Z#][a-zA-Z0-9]{1,8};")
+# Fused guard: first character that could signal either problem.  One
+# alternation scan (sre's character-class loop runs over the whole
+# string in C) replaces separate mojibake and entity passes; clean
+# documents - the majority - are decided by this single pass.
+_NEEDS_FIX_RE = re.compile(r"[&ÃÂâ]")
+
+
+def decode_and_normalize(
+    payload: bytes,
+    is_ascii: Optional[bool] = None,
+    charset_hint: Optional[str] = None,
+) -> str:
+    """Decode raw payload bytes to str, guessing the charset when needed.
+
+    ``is_ascii`` may carry the byte scanner's verdict: pure-ASCII
+    payloads decode identically under every ASCII-superset charset, so
+    they skip declared-charset lookup and detection entirely.
+    ``charset_hint`` is the charset parameter of the HTTP Content-Type
+    header, when the server sent one; it is trusted next, ahead of the
+    in-document declaration.  A charset declared in the document head
+    (HTML <meta> or XML prolog) is trusted after that.  Otherwise a
+    sample of the payload is handed to the detector; if the guess is
+    missing or below ``settings.confidence_threshold`` we assume UTF-8,
+    which is by far the most common encoding on the modern web.
+    """
+    if is_ascii:
+        return payload.decode("ascii", errors="replace")
+    if charset_hint:
+        try:
+            return payload.decode(codecs.lookup(charset_hint).name, errors="replace")
+        except (LookupError, UnicodeDecodeError):
+            pass
+    declared = _CHARSET_RE.search(payload[: settings.html_detection_sample])
+    if declared:
+        try:
+            encoding = codecs.lookup(declared.group(1).decode("ascii")).name
+            return payload.decode(encoding, errors="replace")
+        except (LookupError, UnicodeDecodeError):
+            pass
+    # Strict UTF-8 attempt before any detector runs: most of the modern
+    # web is UTF-8, a successful decode is the decode we need anyway,
+    # and a failure rejects at the first invalid sequence in C.
+    try:
+        return payload.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    sample = payload[: settings.chardet_sample_size]
+    guess = _detect_encoding(sample) or {}
+    encoding = guess.get("encoding") or "utf-8"
+    confidence = guess.get("confidence") or 0.0
+    if confidence < settings.confidence_threshold:
+        encoding = "utf-8"
+    try:
+        return payload.decode(encoding, errors="replace")
+    except (LookupError, ValueError):
+        return payload.decode("utf-8", errors="replace")
+
+
+def fix_text_encoding(text: str, flags: Optional[Tuple[bool, ...]] = None) -> str:
+    """Repair mojibake and rogue HTML entities in decoded text.
+
+    Most modern crawled pages are clean UTF-8: text without the mojibake
+    marker characters and without entities is returned untouched, and
+    text whose only problem is entities goes straight to
+    ``html.unescape``.  Only the rest pays for the full ftfy pipeline.
+    ``flags`` may carry the compiled byte scanner's verdict, whose
+    first two fields are ``(has_ampersand, has_mojibake)``; otherwise
+    the guard is a regex over the decoded string.
+    ``settings.skip_ascii_optimization`` disables the shortcuts.
+    """
+    if not settings.skip_ascii_optimization:
+        if flags is not None:
+            has_ampersand, has_mojibake = flags[0], flags[1]
+            if not has_mojibake:
+                if not has_ampersand:
+                    return text
+                return html.unescape(text)
+        elif text.isascii():
+            # ASCII rules out mojibake entirely (its markers are
+            # non-ASCII), so entity unescaping is all that can apply;
+            # isascii() is a flag check, '&' lookup is memchr.
+            return html.unescape(text) if "&" in text else text
+        else:
+            first = _NEEDS_FIX_RE.search(text)
+            if first is None:
+                return text
+            if first.group() == "&" and _MOJIBAKE_RE.search(text, first.end()) is None:
+                if _ENTITY_RE.search(text, first.start()) is None:
+                    return text
+                return html.unescape(text)
+    if FTFY_AVAILABLE:
+        return ftfy.fix_text(text, config=_FTFY_CONFIG)
+    return html.unescape(text)
+
+
+try:
+    # Compiled fused version (python setup.py build_ext --inplace).
+    from pyrex_decode import fix_text_encoding  # type: ignore[no-redef]  # noqa: F811
+except ImportError:
+    pass
+
+try:
+    # Compiled single-pass byte scanner feeding fix_text_encoding's guard.
+    from pyrex_scan import scan_flags
+    SCAN_AVAILABLE = True
+except ImportError:
+    try:
+        # Numba JIT fallback for installs without the Cython extension:
+        # the same nogil byte loop, compiled by LLVM on first use.
+        import numba
+        import numpy as _np
+
+        @numba.njit(cache=True, boundscheck=False)
+        def _scan_flags_jit(buf):  # pragma: no cover - compiled
+            has_amp = False
+            has_moji = False
+            is_ascii = True
+            in_tag = False
+            visible = 0
+            n = buf.shape[0]
+            for i in range(n):
+                b = buf[i]
+                if in_tag:
+                    if b == 0x3E:  # '>'
+                        in_tag = False
+                elif (
+                    b == 0x3C  # '<' then a name//!? byte opens a tag
+                    and i + 1 < n
+                    and (
+                        buf[i + 1] == 0x2F
+                        or buf[i + 1] == 0x21
+                        or buf[i + 1] == 0x3F
+                        or (0x61 <= (buf[i + 1] | 0x20) <= 0x7A)
+                    )
+                ):
+                    # The slack byte for this tag's joining space.
+                    in_tag = True
+                    visible += 1
+                else:
+                    visible += 1
+                if b == 0x26:
+                    has_amp = True
+                elif b >= 0x80:
+                    is_ascii = False
+                    if b == 0xC2 or b == 0xC3 or b == 0xE2:
+                        has_moji = True
+            return has_amp, has_moji, is_ascii, visible
+
+        def scan_flags(payload: bytes) -> Tuple[bool, bool, bool, int]:
+            """Single-pass byte scan (JIT): see pyrex_scan.scan_flags."""
+            return _scan_flags_jit(_np.frombuffer(payload, dtype=_np.uint8))
+
+        # Warm the JIT at import so the first record does not pay for
+        # LLVM compilation.
+        scan_flags(b"<html>&\xc3\xa9")
+        SCAN_AVAILABLE = True
+    except ImportError:
+        scan_flags = None
+        SCAN_AVAILABLE = False
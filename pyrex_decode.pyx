@@ -0,0 +1,54 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled fast path for per-record text repair.
+
+C-level twin of pyrex_basic.fix_text_encoding with the
+skip_ascii_optimization flag captured once at module init instead of
+being looked up per record.  pyrex_basic silently falls back to its
+pure-Python implementation when this module has not been compiled.
+"""
+
+import html
+import re
+
+try:
+    import ftfy
+    # Entity unescaping fused into ftfy's walk; NFC left to the
+    # pipeline's guarded normalization step.
+    _FTFY_CONFIG = ftfy.TextFixerConfig(
+        unescape_html=True, normalization=None, explain=False
+    )
+except ImportError:
+    ftfy = None
+
+from config.settings import settings
+
+cdef bint _SKIP_ASCII = settings.skip_ascii_optimization
+
+_MOJIBAKE_RE = re.compile(u"[ÃÂâ]")
+_ENTITY_RE = re.compile(u"&[a-zA-Z#][a-zA-Z0-9]{1,8};")
+# Fused guard: one alternation scan decides clean documents.
+_NEEDS_FIX_RE = re.compile(u"[&ÃÂâ]")
+
+
+cpdef str fix_text_encoding(str text, flags=None):
+    """Repair mojibake and rogue HTML entities in decoded text."""
+    if not _SKIP_ASCII:
+        if flags is not None:
+            if not flags[1]:
+                if not flags[0]:
+                    return text
+                return html.unescape(text)
+        elif text.isascii():
+            # ASCII rules out mojibake; only entities can apply.
+            return html.unescape(text) if u"&" in text else text
+        else:
+            first = _NEEDS_FIX_RE.search(text)
+            if first is None:
+                return text
+            if first.group() == u"&" and _MOJIBAKE_RE.search(text, first.end()) is None:
+                if _ENTITY_RE.search(text, first.start()) is None:
+                    return text
+                return html.unescape(text)
+    if ftfy is not None:
+        return ftfy.fix_text(text, config=_FTFY_CONFIG)
+    return html.unescape(text)
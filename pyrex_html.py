@@ -0,0 +1,260 @@
+"""HTML parsing and cleanup.
+
+The primary parser is selectolax (lexbor backend), which parses in C and
+extracts text an order of magnitude faster than BeautifulSoup.  A
+BeautifulSoup fallback is kept for systems without selectolax and for
+users who explicitly ask for it via ``settings.use_lxml_parser``.
+"""
+
+
+from bs4 import BeautifulSoup, Comment, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+from config.settings import settings
+
+# One lxml parser instance shared by every parse call: re-instantiating
+# the parser per document rebuilds its TreeBuilder tables each time.
+_LXML_PARSER = (
+    etree.HTMLParser(remove_comments=True, remove_pis=True) if LXML_AVAILABLE else None
+)
+
+def _elements_to_remove() -> tuple:
+    """Tag names to strip from parsed documents, per current settings."""
+    elements_to_remove = []
+    if settings.remove_scripts:
+        elements_to_remove.append("script")
+    if settings.remove_styles:
+        elements_to_remove.append("style")
+    if settings.remove_metas:
+        elements_to_remove.append("meta")
+    if settings.remove_links:
+        elements_to_remove.append("link")
+    if settings.remove_titles:
+        elements_to_remove.append("title")
+    if settings.remove_base:
+        elements_to_remove.append("base")
+    return tuple(elements_to_remove)
+
+
+# Constants derived from settings, computed once at import instead of per
+# parse call.  Demo/test code that mutates settings at runtime must call
+# invalidate_parse_html_cache() afterwards.
+_REMOVAL_TAGS = _elements_to_remove()
+_REMOVAL_SELECTOR = ",".join(_REMOVAL_TAGS)
+_STREAM_SKIP_TAGS = frozenset(_REMOVAL_TAGS) | {"head"}
+_IS_COMMENT = lambda text, _Comment=Comment: isinstance(text, _Comment)  # noqa: E731
+
+
+def invalidate_parse_html_cache() -> None:
+    """Rebuild the settings-derived parse constants after a settings change."""
+    global _REMOVAL_TAGS, _REMOVAL_SELECTOR, _STREAM_SKIP_TAGS, _EXTRACTOR
+    _REMOVAL_TAGS = _elements_to_remove()
+    _REMOVAL_SELECTOR = ",".join(_REMOVAL_TAGS)
+    _STREAM_SKIP_TAGS = frozenset(_REMOVAL_TAGS) | {"head"}
+    _EXTRACTOR = _build_extractor()
+
+
+class _TextCollectorTarget:
+    """lxml parser target that collects visible text during the parse.
+
+    Text inside the skip tags (and their subtrees) is dropped as the
+    events arrive, so no tree is ever built.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._skip_depth = 0
+
+    def start(self, tag, attrib):
+        if tag in _STREAM_SKIP_TAGS:
+            self._skip_depth += 1
+
+    def end(self, tag):
+        if self._skip_depth and tag in _STREAM_SKIP_TAGS:
+            self._skip_depth -= 1
+
+    def data(self, text):
+        if not self._skip_depth:
+            stripped = text.strip()
+            if stripped:
+                self._parts.append(stripped)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return " ".join(self._parts)
+
+
+def extract_text_streaming(chunks, encoding: str = "utf-8") -> str:
+    """Extract visible text from an iterable of raw byte chunks.
+
+    Feeds lxml's incremental parser with a text-collecting target, so a
+    document of any size is processed with only one chunk plus the text
+    parts in memory - no payload bytes object and no parse tree.  The
+    encoding hint comes straight from an HTTP header and may name
+    anything ("none", "x-user-defined", ...); unknown names fall back
+    to UTF-8, mirroring the non-streaming decode path.
+    """
+    target = _TextCollectorTarget()
+    try:
+        parser = etree.HTMLParser(target=target, encoding=encoding)
+    except LookupError:
+        parser = etree.HTMLParser(target=target, encoding="utf-8")
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+def parse_html(html_content: str, text_only: bool = False):
+    """Parse an HTML document and strip non-content elements.
+
+    Returns a ``LexborHTMLParser`` tree on the fast path, a raw lxml
+    tree when ``settings.use_lxml_parser`` is set or selectolax is
+    missing, or a ``BeautifulSoup`` tree as last resort.  ``text_only``
+    tells the bs4 fallback that the caller will never serialize the
+    tree, letting it skip non-content subtrees at parse time.
+    """
+    if SELECTOLAX_AVAILABLE and not settings.use_lxml_parser:
+        tree = LexborHTMLParser(html_content)
+        if _REMOVAL_SELECTOR:
+            for node in tree.css(_REMOVAL_SELECTOR):
+                node.decompose()
+        return tree
+    if LXML_AVAILABLE:
+        # Raw lxml is ~10x faster than building a BeautifulSoup tree on
+        # top of it, so the slow path goes straight to etree whenever
+        # lxml is importable; bs4 only handles lxml-less installs.
+        return _parse_html_lxml(html_content)
+    return _parse_html_bs4(html_content, text_only)
+
+
+def _parse_html_lxml(html_content: str):
+    """Parse with the shared lxml parser instance, skipping BS4 entirely."""
+    root = lxml.html.fromstring(html_content, parser=_LXML_PARSER)
+    if _REMOVAL_TAGS:
+        for element in list(root.iter(*_REMOVAL_TAGS)):
+            parent = element.getparent()
+            if parent is not None:
+                parent.remove(element)
+    return root
+
+
+def _parse_html_bs4(html_content: str, text_only: bool = False) -> BeautifulSoup:
+    """BeautifulSoup fallback parse with the same element stripping.
+
+    For text-only callers, unwanted elements are filtered out during
+    the parse with a ``SoupStrainer`` instead of being decomposed
+    afterwards, so their Python tag objects are never materialized at
+    all.  Callers that serialize the tree get a full parse (a strained
+    document cannot round-trip markup) with the removal tags decomposed
+    after the fact.
+    """
+    parser = "lxml" if LXML_AVAILABLE else "html.parser"
+    strainer = None
+    if text_only:
+        excluded = _REMOVAL_TAGS + ("head",)
+        strainer = SoupStrainer(lambda name: name not in excluded)
+    try:
+        soup = BeautifulSoup(html_content, parser, parse_only=strainer)
+    except Exception:
+        try:
+            soup = BeautifulSoup(html_content, "html.parser", parse_only=strainer)
+        except Exception:
+            # Both parsers failed on this document; return an empty tree
+            # and let pass_minimal_html reject it instead of paying for
+            # an html.escape copy of a payload we cannot parse anyway.
+            return BeautifulSoup("", "html.parser")
+    if not text_only:
+        for tag_name in _REMOVAL_TAGS:
+            for element in soup.find_all(tag_name):
+                element.decompose()
+    if settings.remove_comments:
+        for comment in soup.find_all(string=_IS_COMMENT):
+            comment.extract()
+    return soup
+
+
+def extract_visible_text(tree) -> str:
+    """Extract whitespace-normalized visible text from a parsed tree."""
+    if SELECTOLAX_AVAILABLE and isinstance(tree, LexborHTMLParser):
+        body = tree.body
+        return body.text(separator=" ", strip=True) if body is not None else ""
+    if LXML_AVAILABLE and isinstance(tree, etree._Element):
+        return " ".join(part for part in (t.strip() for t in tree.itertext()) if part)
+    return tree.get_text(separator=" ", strip=True)
+
+
+def _build_extractor():
+    """Bake the parser choice and settings into one text-extractor closure.
+
+    Everything that would otherwise be decided per call - which parser
+    to use, which tags to strip, the compiled XPath for lxml - is
+    resolved once here, so ``extract_text_fast`` is a single closure
+    call per record.
+    """
+    if SELECTOLAX_AVAILABLE and not settings.use_lxml_parser:
+        removal_selector = _REMOVAL_SELECTOR
+
+        def extract(html_content: str) -> str:
+            tree = LexborHTMLParser(html_content)
+            if removal_selector:
+                for node in tree.css(removal_selector):
+                    node.decompose()
+            body = tree.body
+            return body.text(separator=" ", strip=True) if body is not None else ""
+
+        return extract
+
+    if LXML_AVAILABLE:
+        skip_tags = _REMOVAL_TAGS + ("head",)
+        predicate = " and ".join(f"not(ancestor::{tag})" for tag in skip_tags)
+        text_xpath = etree.XPath(f"//text()[{predicate}]" if predicate else "//text()")
+
+        def extract(html_content: str) -> str:
+            root = lxml.html.fromstring(html_content, parser=_LXML_PARSER)
+            return " ".join(
+                part for part in (t.strip() for t in text_xpath(root)) if part
+            )
+
+        return extract
+
+    def extract(html_content: str) -> str:
+        soup = _parse_html_bs4(html_content, text_only=True)
+        return soup.get_text(separator=" ", strip=True)
+
+    return extract
+
+
+_EXTRACTOR = _build_extractor()
+
+
+def extract_text_fast(html_content) -> str:
+    """Parse and extract visible text in one call via the baked extractor.
+
+    Accepts str or bytes: every backend parses bytes natively, so
+    pure-ASCII payloads can skip their decode upstream.
+    """
+    return _EXTRACTOR(html_content)
+
+
+def pass_minimal_html(tree) -> tuple:
+    """Check whether a parsed document has enough visible text to keep.
+
+    Returns ``(keep, text)`` so the caller can reuse the extracted text
+    directly instead of walking the tree a second time.
+    """
+    text = extract_visible_text(tree)
+    return len(text) >= settings.minimal_text_length, text
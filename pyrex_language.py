@@ -0,0 +1,122 @@
+"""Language detection and filtering for extracted text.
+
+Detection runs on the visible text the pipeline has already extracted,
+never on raw HTML, so enabling the filter adds no extra parse or
+extraction pass.
+"""
+
+from typing import List, Optional, Tuple
+
+try:
+    from lingua import LanguageDetectorBuilder
+    LINGUA_AVAILABLE = True
+except ImportError:
+    LINGUA_AVAILABLE = False
+
+from config.settings import settings
+
+_detector = None
+
+
+def _get_detector():
+    """Build the lingua detector once per process and reuse it afterwards.
+
+    The detector covers all languages - restricting it to
+    ``settings.accepted_languages`` would force every document into the
+    accept list and break rejection.  Models are preloaded at build so
+    no record pays for lazy n-gram loading mid-stream.
+    """
+    global _detector
+    if _detector is None:
+        _detector = (
+            LanguageDetectorBuilder.from_all_languages()
+            .with_preloaded_language_models()
+            .build()
+        )
+    return _detector
+
+
+def detect_and_filter_languages(text: str) -> Tuple[bool, Optional[str]]:
+    """Detect the language of ``text`` and check it against the accept list.
+
+    Returns ``(keep, iso_code)``.  The fast path is a single top-1
+    ``detect_language_of`` call; only when
+    ``settings.language_confidence_threshold`` is set does the single-
+    language confidence score get computed, and only for documents the
+    accept list would otherwise keep.  Texts shorter than
+    ``settings.language_min_chars`` are rejected outright: n-gram
+    detection is unreliable below a couple of dozen characters, so tiny
+    snippets skip the detector entirely.  Without lingua installed
+    every document passes, mirroring how the other optional stages
+    degrade.
+    """
+    if not LINGUA_AVAILABLE:
+        return True, None
+    if len(text) < settings.language_min_chars:
+        return False, None
+    detector = _get_detector()
+    return _verdict(detector, text, detector.detect_language_of(text))
+
+
+def detect_and_filter_languages_batch(
+    texts: List[str],
+) -> List[Tuple[bool, Optional[str]]]:
+    """Batched variant of ``detect_and_filter_languages``.
+
+    One ``detect_languages_in_parallel_of`` call scores the whole batch
+    inside lingua's Rust threads with the GIL released, instead of one
+    FFI round-trip per document.  Verdicts come back in input order.
+    """
+    if not LINGUA_AVAILABLE:
+        return [(True, None)] * len(texts)
+    if not texts:
+        return []
+    detector = _get_detector()
+    # Texts below the viability threshold never reach the detector;
+    # only the eligible ones travel in the parallel call.
+    min_chars = settings.language_min_chars
+    verdicts: List[Tuple[bool, Optional[str]]] = [(False, None)] * len(texts)
+    eligible = [i for i, text in enumerate(texts) if len(text) >= min_chars]
+    if eligible:
+        languages = detector.detect_languages_in_parallel_of(
+            [texts[i] for i in eligible]
+        )
+        for i, language in zip(eligible, languages):
+            verdicts[i] = _verdict(detector, texts[i], language)
+    return verdicts
+
+
+def score_languages(text: str) -> List[Tuple[str, float]]:
+    """Score every language's confidence for ``text`` in one detector pass.
+
+    Returns ``(iso_code, confidence)`` pairs sorted by descending
+    confidence.  The n-gram scoring behind this vector is independent of
+    any threshold, so callers sweeping several thresholds over the same
+    text (the precision tests do) score it once and compare in Python
+    instead of re-running detection per threshold.
+    """
+    if not LINGUA_AVAILABLE:
+        return []
+    return [
+        (entry.language.iso_code_639_1.name.lower(), entry.value)
+        for entry in _get_detector().compute_language_confidence_values(text)
+    ]
+
+
+def _verdict(detector, text: str, language) -> Tuple[bool, Optional[str]]:
+    """Turn one detection result into the (keep, iso_code) verdict."""
+    if language is None:
+        return False, None
+    code = language.iso_code_639_1.name.lower()
+    if code not in settings.accepted_languages:
+        return False, code
+    threshold = settings.language_confidence_threshold
+    if threshold > 0.0 and detector.compute_language_confidence(text, language) < threshold:
+        return False, code
+    return True, code
+
+
+if LINGUA_AVAILABLE and settings.enable_language_filtering:
+    # Filtering is on for this run: pay the model build at import, not
+    # on the first record.
+    _get_detector()
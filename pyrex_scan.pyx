@@ -0,0 +1,124 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled single-pass byte scanner for the per-record repair guards.
+
+Walks the raw payload once at C level and reports whether it contains
+an ampersand (possible HTML entity), whether it contains the lead
+bytes of the mojibake marker characters (0xC2/0xC3/0xE2, covering
+Ã/Â/â in both UTF-8 and Latin-1 payloads), and whether it is pure
+ASCII, plus an upper bound on visible text length (bytes outside
+angle-bracket tags, with one slack byte per tag for the spaces
+extraction joins text nodes with).  Fusing all the verdicts into one
+pass lets the
+pipeline skip charset detection, ftfy and NFC checks for clean ASCII
+documents and reject too-short documents before decoding, without any
+extra walk over the payload.  pyrex_basic falls back to its regex
+guard over the decoded string when this module is not compiled.
+"""
+
+
+cpdef bint is_html_prefix(const unsigned char[::1] buf):
+    """Case-insensitive check for an HTML prefix on raw payload bytes.
+
+    Equivalent to the ``\\s*<(!doctype\\s+html\\b|html\\b)`` sniff regex
+    but runs as a plain C byte loop with no match object: skip leading
+    whitespace, then accept ``<html`` or ``<!doctype html`` followed by
+    a non-word byte.  Only the first few dozen bytes are ever read, so
+    callers can pass the whole payload without slicing.
+    """
+    cdef Py_ssize_t i = 0, n = buf.shape[0]
+    cdef unsigned char b
+    with nogil:
+        while i < n:
+            b = buf[i]
+            if b == 0x20 or (b >= 0x09 and b <= 0x0D):
+                i += 1
+            else:
+                break
+        if i >= n or buf[i] != 0x3C:  # '<'
+            return False
+        i += 1
+        if i < n and buf[i] == 0x21:  # '!'
+            if not _match_word(buf, n, i + 1, b"doctype", 7):
+                return False
+            i += 8
+            if i >= n or not (buf[i] == 0x20 or (buf[i] >= 0x09 and buf[i] <= 0x0D)):
+                return False
+            while i < n and (buf[i] == 0x20 or (buf[i] >= 0x09 and buf[i] <= 0x0D)):
+                i += 1
+        return _match_word(buf, n, i, b"html", 4) and _word_boundary(buf, n, i + 4)
+
+
+cdef bint _match_word(
+    const unsigned char[::1] buf, Py_ssize_t n, Py_ssize_t i,
+    const unsigned char* word, Py_ssize_t wlen,
+) noexcept nogil:
+    """Case-insensitively match an ASCII-letter word at position i."""
+    cdef Py_ssize_t j
+    if i + wlen > n:
+        return False
+    for j in range(wlen):
+        if (buf[i + j] | 0x20) != word[j]:
+            return False
+    return True
+
+
+cdef bint _word_boundary(
+    const unsigned char[::1] buf, Py_ssize_t n, Py_ssize_t i
+) noexcept nogil:
+    """True when position i is past the buffer or at a non-word byte."""
+    cdef unsigned char b
+    if i >= n:
+        return True
+    b = buf[i]
+    if b >= 0x30 and b <= 0x39:  # 0-9
+        return False
+    if (b | 0x20) >= 0x61 and (b | 0x20) <= 0x7A:  # a-z
+        return False
+    return b != 0x5F  # '_'
+
+
+cdef inline bint _tag_start(unsigned char b) noexcept nogil:
+    """True for bytes that may follow '<' in a tag per the HTML5 rule."""
+    if b == 0x2F or b == 0x21 or b == 0x3F:  # '/', '!', '?'
+        return True
+    return (b | 0x20) >= 0x61 and (b | 0x20) <= 0x7A  # a-z
+
+
+cpdef tuple scan_flags(const unsigned char[::1] buf):
+    """Return (has_ampersand, has_mojibake_lead, is_ascii, visible_bound).
+
+    The fourth field counts bytes outside angle-bracket tags plus one
+    per tag - an upper bound on visible text length (extraction joins
+    text nodes with a space, so every tag boundary may add a character
+    the raw bytes never show), fused into the same pass so the pipeline
+    can reject too-short documents before decoding or parsing.  A '<'
+    only opens a tag when followed by a name, end-tag, comment or PI
+    character, so a raw '<' in visible text counts as text instead of
+    swallowing what follows.
+    """
+    cdef Py_ssize_t i, n = buf.shape[0]
+    cdef Py_ssize_t visible = 0
+    cdef bint has_amp = False
+    cdef bint has_moji = False
+    cdef bint is_ascii = True
+    cdef bint in_tag = False
+    cdef unsigned char b
+    with nogil:
+        for i in range(n):
+            b = buf[i]
+            if in_tag:
+                if b == 0x3E:  # '>'
+                    in_tag = False
+            elif b == 0x3C and i + 1 < n and _tag_start(buf[i + 1]):  # '<'
+                # The slack byte for this tag's joining space.
+                in_tag = True
+                visible += 1
+            else:
+                visible += 1
+            if b == 0x26:
+                has_amp = True
+            elif b >= 0x80:
+                is_ascii = False
+                if b == 0xC2 or b == 0xC3 or b == 0xE2:
+                    has_moji = True
+    return has_amp, has_moji, is_ascii, visible
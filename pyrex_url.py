@@ -0,0 +1,170 @@
+"""URL parsing and filtering for WARC target URIs.
+
+The filter runs on the WARC-Target-URI header alone, before any payload
+bytes are read, so rejected records cost one suffix lookup and nothing
+else.
+"""
+
+import functools
+from typing import Optional, Tuple
+
+try:
+    import tldextract
+    TLDEXTRACT_AVAILABLE = True
+except ImportError:
+    TLDEXTRACT_AVAILABLE = False
+
+from config.settings import settings
+
+# One extractor for the whole process, built at import: the suffix trie
+# is constructed exactly once, and with no suffix list URLs and no cache
+# directory the bundled snapshot is used without ever touching the
+# network or the filesystem.
+_TLD_EXTRACT = (
+    tldextract.TLDExtract(
+        suffix_list_urls=(), cache_dir=None, fallback_to_snapshot=True
+    )
+    if TLDEXTRACT_AVAILABLE
+    else None
+)
+
+
+# Accept sets, lowered and frozen once at import: per-URL membership is
+# one hash probe instead of lowering and scanning a list per record.
+# Demo/test code that mutates settings at runtime must call
+# refresh_url_filter_cache() afterwards.
+_ACCEPTED_TLDS = frozenset(t.lower() for t in settings.accepted_tlds)
+_ACCEPTED_SUBDOMAINS = frozenset(s.lower() for s in settings.accepted_subdomains)
+_ACCEPTED_SEGMENTS = frozenset(p.lower() for p in settings.accepted_path_segments)
+# With only single-label TLDs accepted (no "co.uk"-style suffixes), the
+# last dotted host label alone decides rejection, without tldextract.
+_TLDS_ALL_SINGLE_LABEL = all("." not in t for t in _ACCEPTED_TLDS)
+
+
+def refresh_url_filter_cache() -> None:
+    """Rebuild the settings-derived accept sets after a settings change."""
+    global _ACCEPTED_TLDS, _ACCEPTED_SUBDOMAINS, _ACCEPTED_SEGMENTS, \
+        _TLDS_ALL_SINGLE_LABEL, _URL_FILTER
+    _ACCEPTED_TLDS = frozenset(t.lower() for t in settings.accepted_tlds)
+    _ACCEPTED_SUBDOMAINS = frozenset(s.lower() for s in settings.accepted_subdomains)
+    _ACCEPTED_SEGMENTS = frozenset(p.lower() for p in settings.accepted_path_segments)
+    _TLDS_ALL_SINGLE_LABEL = all("." not in t for t in _ACCEPTED_TLDS)
+    _classify_host.cache_clear()
+    _URL_FILTER = _build_url_filter()
+
+
+_NETLOC_END = ":/?#"
+
+
+def _path_of(url: str) -> str:
+    """Return the URL's path component via a handful of str.find calls.
+
+    Avoids a full urlsplit (scheme/query/fragment parsing and tuple
+    construction) when only the path matters.
+    """
+    start = url.find("//")
+    start = start + 2 if start >= 0 else 0
+    slash = url.find("/", start)
+    if slash < 0:
+        return ""
+    end = len(url)
+    for delimiter in "?#":
+        position = url.find(delimiter, slash, end)
+        if position >= 0:
+            end = position
+    return url[slash:end]
+
+
+def _host_of(url: str) -> str:
+    """Return the URL's host, lowered, via a handful of str.find calls."""
+    start = url.find("//")
+    start = start + 2 if start >= 0 else 0
+    end = len(url)
+    for delimiter in _NETLOC_END:
+        position = url.find(delimiter, start, end)
+        if position >= 0:
+            end = position
+    return url[start:end].lower()
+
+
+@functools.lru_cache(maxsize=100_000)
+def _classify_host(host: str) -> Tuple[bool, Optional[str]]:
+    """Decide keep/drop for one host against the TLD and subdomain sets.
+
+    WARC files have massive host locality, so the verdict is cached per
+    host: repeated hosts cost one dict hit instead of label scanning or
+    a suffix-trie walk.  Path-segment checks stay per URL in
+    ``parse_and_filter_url``.
+    """
+    # Fast path on the last host label: most hosts are decided here by
+    # one rfind, and only the rest walk the suffix trie.
+    if _ACCEPTED_TLDS:
+        label = host[host.rfind(".") + 1 :]
+        if label in _ACCEPTED_TLDS:
+            if not _ACCEPTED_SUBDOMAINS:
+                return True, label
+        elif _TLDS_ALL_SINGLE_LABEL:
+            # Any multi-label public suffix still ends in its last
+            # label, so with single-label accepts this is a safe reject.
+            return False, None
+    # Only the closures built with tldextract present call this.
+    assert _TLD_EXTRACT is not None
+    parts = _TLD_EXTRACT(host)
+    suffix = parts.suffix
+    if not suffix:
+        return False, None
+    if _ACCEPTED_TLDS and suffix not in _ACCEPTED_TLDS:
+        return False, suffix
+    if _ACCEPTED_SUBDOMAINS and parts.subdomain not in _ACCEPTED_SUBDOMAINS:
+        return False, suffix
+    return True, suffix
+
+
+def _build_url_filter():
+    """Bake the configured checks into one specialized filter closure.
+
+    Mirrors pyrex_html._build_extractor: the feature-flag branches and
+    module-global lookups that would otherwise run per URL are resolved
+    once here, so the hot path is a closure over locals with no dead
+    branches.
+    """
+    if not TLDEXTRACT_AVAILABLE:
+        def filter_url(url: str) -> Tuple[bool, Optional[str]]:
+            return True, None
+
+        return filter_url
+
+    classify_host = _classify_host
+    host_of = _host_of
+    if not _ACCEPTED_SEGMENTS:
+        def filter_url(url: str) -> Tuple[bool, Optional[str]]:
+            return classify_host(host_of(url))
+
+        return filter_url
+
+    accepted_segments = _ACCEPTED_SEGMENTS
+    path_of = _path_of
+
+    def filter_url(url: str) -> Tuple[bool, Optional[str]]:
+        keep, suffix = classify_host(host_of(url))
+        # str.split and frozenset.isdisjoint both run in C and
+        # isdisjoint stops at the first accepted segment.
+        if keep and accepted_segments.isdisjoint(path_of(url).lower().split("/")):
+            return False, suffix
+        return keep, suffix
+
+    return filter_url
+
+
+_URL_FILTER = _build_url_filter()
+
+
+def parse_and_filter_url(url: str) -> Tuple[bool, Optional[str]]:
+    """Check a URL's suffix, subdomain and path against the accept lists.
+
+    Returns ``(keep, suffix)``.  URLs without a recognized public suffix
+    (bare IPs, localhost, garbage) are dropped; an empty accept set
+    skips its check entirely.  Without tldextract installed every URL
+    passes, mirroring how the other optional stages degrade.
+    """
+    return _URL_FILTER(url)
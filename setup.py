@@ -0,0 +1,28 @@
+"""Build the optional compiled fast paths:
+
+    python setup.py build_ext --inplace
+
+The pipeline runs fine without them; when a compiled module is present
+it is picked up automatically and silently preferred.
+
+Setting ``PYREX_MYPYC=1`` additionally compiles the type-annotated hot
+modules (``pyrex.py``, ``pyrex_basic.py``) with mypyc, removing
+interpreter dispatch from the per-record glue code.  The pure-Python
+sources remain the import fallback when no extension is present.
+"""
+
+import os
+
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize(["pyrex_decode.pyx", "pyrex_scan.pyx"], language_level="3")
+except ImportError:
+    ext_modules = []
+
+if os.environ.get("PYREX_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules += mypycify(["pyrex.py", "pyrex_basic.py"])
+
+setup(name="pyrex", ext_modules=ext_modules)
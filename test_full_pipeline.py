@@ -0,0 +1,110 @@
+"""End-to-end tests for process_record and the dump output path.
+
+The padded documents are built once at import: each test body reads a
+module constant instead of re-multiplying and re-concatenating the same
+kilobyte of markup per test (and per parametrized case).
+"""
+
+import gzip
+import io
+
+from warcio.statusandheaders import StatusAndHeaders
+from warcio.warcwriter import WARCWriter
+
+import pyrex
+from config.settings import settings
+from pyrex import RecordMeta, process_record
+
+# Padding that puts a document comfortably past minimal_text_length
+# (100 chars by default) without relying on the prose length.
+_PAD = "X" * 500
+
+_ENGLISH_HTML = (
+    "<html><head><title>t</title></head><body>"
+    "<p>The quick brown fox jumps over the lazy dog. " + _PAD + "</p>"
+    "</body></html>"
+)
+_GERMAN_HTML = (
+    "<html><head><title>t</title></head><body>"
+    "<p>Der schnelle braune Fuchs springt über den faulen Hund. " + _PAD + "</p>"
+    "</body></html>"
+)
+_SHORT_HTML = "<html><body><p>too short</p></body></html>"
+
+
+def _meta(idx: int = 1) -> RecordMeta:
+    return RecordMeta(
+        idx=idx,
+        rec_type="response",
+        uri="http://example.com/",
+        date="2026-01-01T00:00:00Z",
+        ctype="text/html",
+        clen="1234",
+        rid="<urn:uuid:00000000-0000-0000-0000-000000000001>",
+    )
+
+
+def test_keeps_long_document():
+    result = process_record(_meta(), _ENGLISH_HTML)
+    assert result is not None
+    assert result["record_data"] is not None
+    assert "quick brown fox" in result["visible_text"]
+    assert _PAD in result["visible_text"]
+
+
+def test_rejects_short_document():
+    assert process_record(_meta(), _SHORT_HTML) is None
+
+
+def test_bytes_payload_matches_str_payload():
+    # Pure-ASCII payloads travel as bytes through the pipeline; the
+    # result must be identical to handing over the decoded str.
+    from_bytes = process_record(_meta(), _ENGLISH_HTML.encode("ascii"))
+    from_str = process_record(_meta(), _ENGLISH_HTML)
+    assert from_bytes is not None and from_str is not None
+    assert from_bytes["visible_text"] == from_str["visible_text"]
+
+
+def _write_warc(path, html_bytes):
+    with open(path, "wb") as out:
+        writer = WARCWriter(out, gzip=True)
+        http_headers = StatusAndHeaders(
+            "200 OK", [("Content-Type", "text/html; charset=utf-8")], protocol="HTTP/1.1"
+        )
+        record = writer.create_warc_record(
+            "http://example.com/",
+            "response",
+            payload=io.BytesIO(html_bytes),
+            http_headers=http_headers,
+        )
+        writer.write_record(record)
+
+
+def test_dump_round_trip(tmp_path):
+    # Full read_warc_file pass in dump mode: the written .txt.gz must
+    # decompress cleanly (a truncated compressor or buffer tail would
+    # raise here) and contain the record's metadata and text.
+    warc_path = tmp_path / "sample.warc.gz"
+    _write_warc(str(warc_path), _ENGLISH_HTML.encode("ascii"))
+    saved = (settings.output_mode, settings.output_directory)
+    settings.output_mode = "dump"
+    settings.output_directory = str(tmp_path / "out")
+    pyrex.refresh_settings_cache()
+    try:
+        pyrex.read_warc_file(str(warc_path))
+    finally:
+        settings.output_mode, settings.output_directory = saved
+        pyrex.refresh_settings_cache()
+    dump_file = tmp_path / "out" / "sample.warc.txt.gz"
+    dumped = gzip.decompress(dump_file.read_bytes()).decode("utf-8")
+    assert "WARC-Target-URI: http://example.com/" in dumped
+    assert "quick brown fox" in dumped
+
+
+def test_language_filter_off_keeps_german():
+    # Language filtering is disabled in the default configuration, so
+    # non-English documents pass through untouched.
+    assert not pyrex._ENABLE_LANGUAGE_FILTERING
+    result = process_record(_meta(), _GERMAN_HTML)
+    assert result is not None
+    assert "braune Fuchs" in result["visible_text"]
@@ -0,0 +1,63 @@
+"""Tests for the language detection and filtering stage.
+
+Every test shares the one process-wide lingua detector; the
+session-scoped warmup fixture in conftest.py pays the model load once,
+so individual cases measure detection only.
+"""
+
+import pytest
+
+import pyrex_language
+from pyrex_language import (
+    detect_and_filter_languages,
+    detect_and_filter_languages_batch,
+)
+
+ENGLISH = "The quick brown fox jumps over the lazy dog and keeps on running."
+GERMAN = "Der schnelle braune Fuchs springt über den faulen Hund und läuft weiter."
+
+# (text, expected_keep, expected_iso_code) with the default accept
+# list of ("en",).
+CASES = [
+    (ENGLISH, True, "en"),
+    (GERMAN, False, "de"),
+]
+
+needs_lingua = pytest.mark.skipif(
+    not pyrex_language.LINGUA_AVAILABLE, reason="lingua is not installed"
+)
+
+
+@needs_lingua
+def test_detector_is_built_once():
+    assert pyrex_language._get_detector() is pyrex_language._get_detector()
+
+
+@needs_lingua
+@pytest.mark.parametrize("text,expected_keep,expected_code", CASES)
+def test_detection_verdicts(text, expected_keep, expected_code):
+    keep, code = detect_and_filter_languages(text)
+    assert keep == expected_keep
+    assert code == expected_code
+
+
+@needs_lingua
+def test_rejects_below_min_chars():
+    # Snippets under language_min_chars never reach the detector.
+    assert detect_and_filter_languages("hi") == (False, None)
+    assert detect_and_filter_languages_batch(["hi", ENGLISH]) == [
+        (False, None),
+        detect_and_filter_languages(ENGLISH),
+    ]
+
+
+@needs_lingua
+def test_batch_matches_single_calls():
+    texts = [text for text, _, _ in CASES]
+    assert detect_and_filter_languages_batch(texts) == [
+        detect_and_filter_languages(text) for text in texts
+    ]
+
+
+def test_empty_batch():
+    assert detect_and_filter_languages_batch([]) == []
@@ -0,0 +1,81 @@
+"""Precision tests for the language confidence scores behind the filter.
+
+Each text is scored exactly once through ``score_languages``; threshold
+sweeps then compare against the cached confidence vector in pure
+Python, so the lingua n-gram scoring never reruns per threshold.
+"""
+
+import pytest
+
+import pyrex_language
+from pyrex_language import detect_and_filter_languages, score_languages
+
+needs_lingua = pytest.mark.skipif(
+    not pyrex_language.LINGUA_AVAILABLE, reason="lingua is not installed"
+)
+
+# (label, text, expected_top_iso_code)
+TEST_CASES = (
+    (
+        "english",
+        "The committee published its annual report on Tuesday, noting that "
+        "membership had grown steadily over the previous decade and that "
+        "further expansion was expected in the coming years.",
+        "en",
+    ),
+    (
+        "german",
+        "Der Ausschuss veröffentlichte am Dienstag seinen Jahresbericht und "
+        "stellte fest, dass die Mitgliederzahl im letzten Jahrzehnt stetig "
+        "gewachsen war und weiteres Wachstum erwartet wird.",
+        "de",
+    ),
+    (
+        "dutch",
+        "De commissie publiceerde dinsdag haar jaarverslag en merkte op dat "
+        "het ledental het afgelopen decennium gestaag was gegroeid en dat "
+        "verdere groei de komende jaren wordt verwacht.",
+        "nl",
+    ),
+)
+
+THRESHOLDS = (0.3, 0.5, 0.7, 0.9)
+
+
+@needs_lingua
+def test_scores_are_sorted_descending():
+    for _, text, _ in TEST_CASES:
+        values = [confidence for _, confidence in score_languages(text)]
+        assert values == sorted(values, reverse=True)
+
+
+@needs_lingua
+def test_top_score_matches_detection():
+    # The top of the confidence vector and the top-1 detection call must
+    # name the same language.
+    for _, text, expected in TEST_CASES:
+        top_code, _ = score_languages(text)[0]
+        _, detected = detect_and_filter_languages(text)
+        assert top_code == detected == expected
+
+
+@needs_lingua
+def test_threshold_sweep_over_cached_scores():
+    # Score once per text, then sweep thresholds against the cached
+    # vectors: with "en" as the accept list, non-English texts must be
+    # rejected at every threshold, and clearly English text must survive
+    # the permissive end of the sweep.
+    top = {label: score_languages(text)[0] for label, text, _ in TEST_CASES}
+    for threshold in THRESHOLDS:
+        for label, _, expected in TEST_CASES:
+            code, confidence = top[label]
+            accepted = code == "en" and confidence >= threshold
+            if expected != "en":
+                assert not accepted
+    english_code, english_confidence = top["english"]
+    assert english_code == "en" and english_confidence >= THRESHOLDS[0]
+
+
+def test_scores_without_lingua_degrade_to_empty():
+    if not pyrex_language.LINGUA_AVAILABLE:
+        assert score_languages("anything") == []
@@ -0,0 +1,90 @@
+"""Tests for the URL accept filter in pyrex_url.
+
+Tests that narrow the accept sets mutate settings and call
+refresh_url_filter_cache(), mirroring what the module docstring asks of
+any runtime settings change; the fixture restores and refreshes again
+so the other test files keep seeing the defaults.
+"""
+
+import pytest
+
+import pyrex_url
+from config.settings import settings
+from pyrex_url import parse_and_filter_url, refresh_url_filter_cache
+
+needs_tldextract = pytest.mark.skipif(
+    not pyrex_url.TLDEXTRACT_AVAILABLE, reason="tldextract is not installed"
+)
+
+# (description, url, expected_keep) under the default empty accept sets:
+# any recognized public suffix passes, anything without one is dropped.
+DEFAULT_CASES = (
+    ("plain com", "http://example.com/", True),
+    ("german tld", "https://www.beispiel.de/pfad", True),
+    ("multi-label suffix", "https://shop.example.co.uk/", True),
+    ("bare ip", "http://192.168.0.1/", False),
+    ("localhost", "http://localhost/", False),
+)
+
+GERMAN_REGION_CASES = (
+    ("german tld", "https://www.beispiel.de/", True),
+    ("austrian tld", "https://wien.example.at/", True),
+    ("swiss tld", "https://example.ch/seite", True),
+    ("com rejected", "http://example.com/", False),
+    ("uk rejected", "https://example.co.uk/", False),
+)
+
+
+@pytest.fixture
+def restore_url_settings():
+    """Put the accept sets back and rebuild the filter after the test."""
+    saved = (
+        settings.accepted_tlds,
+        settings.accepted_subdomains,
+        settings.accepted_path_segments,
+    )
+    yield
+    (
+        settings.accepted_tlds,
+        settings.accepted_subdomains,
+        settings.accepted_path_segments,
+    ) = saved
+    refresh_url_filter_cache()
+
+
+@needs_tldextract
+@pytest.mark.parametrize("description,url,expected", DEFAULT_CASES)
+def test_default_accepts_any_public_suffix(description, url, expected):
+    keep, _ = parse_and_filter_url(url)
+    assert keep == expected, description
+
+
+@needs_tldextract
+def test_tld_accept_list(restore_url_settings):
+    settings.accepted_tlds = ("de", "at", "ch")
+    refresh_url_filter_cache()
+    for description, url, expected in GERMAN_REGION_CASES:
+        keep, _ = parse_and_filter_url(url)
+        assert keep == expected, description
+
+
+@needs_tldextract
+def test_path_segment_filter(restore_url_settings):
+    settings.accepted_path_segments = ("blog",)
+    refresh_url_filter_cache()
+    keep, _ = parse_and_filter_url("http://example.com/blog/post-1")
+    assert keep
+    keep, _ = parse_and_filter_url("http://example.com/shop/item-1")
+    assert not keep
+
+
+@needs_tldextract
+def test_refresh_rebuilds_filter(restore_url_settings):
+    # The baked closure and the host cache must both follow a settings
+    # change once refresh_url_filter_cache() runs.
+    keep, _ = parse_and_filter_url("http://example.com/")
+    assert keep
+    settings.accepted_tlds = ("de",)
+    refresh_url_filter_cache()
+    keep, _ = parse_and_filter_url("http://example.com/")
+    assert not keep